@@ -0,0 +1,74 @@
+"""
+This module measures memory per user and throughput of the users deduplicators,
+compared to a plain set of profile links.
+
+Usage:
+    python -m benchmarks.dedup [number_of_users]
+"""
+import sys
+import time
+
+from src.dedup import Deduplicator, create_deduplicator
+
+
+class SetDeduplicator(Deduplicator):
+    """
+    Baseline, that keeps the profile links themselves in a set.
+    """
+
+    def __init__(self) -> None:
+        self._keys = set()
+
+
+    def add(self, key: str) -> bool:
+        if key in self._keys:
+            return False
+        self._keys.add(key)
+        return True
+
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._keys
+
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+    @property
+    def memory_usage(self) -> int:
+        # The set keeps the strings alive, so they are counted as well
+        return sys.getsizeof(self._keys) + sum(sys.getsizeof(key) for key in self._keys)
+
+
+def run(mode: str, n: int) -> None:
+    """
+    Feed `n` unique profile links, each one twice, into a deduplicator and print the results.
+
+    Args:
+        mode (str): The deduplication mode, "set" for the baseline.
+        n (int): The number of unique users.
+    """
+    keys = [f"https://medium.com/@user_{i}" for i in range(n)]
+    dedup = SetDeduplicator() if mode == "set" else create_deduplicator(mode, capacity=n)
+
+    start = time.perf_counter()
+    unique = sum(dedup.add(key) for key in keys)
+    duplicates = sum(dedup.add(key) for key in keys)
+    took = time.perf_counter() - start
+
+    print(
+        f"{mode:>6}: {2 * n / took:,.0f} keys/s, "
+        f"{dedup.memory_usage / n:.2f} bytes/user, "
+        f"{n - unique} new users dropped, {duplicates} duplicates passed"
+    )
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    for mode in ("set", "exact", "bloom"):
+        run(mode, n)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+This module measures fetching and exporting users of a post against a recorded cassette.
+
+Usage:
+    python -m benchmarks.fetch_users record <cassette> <link>
+    python -m benchmarks.fetch_users replay <cassette> <link> [speed] [compression]
+"""
+import sys
+import time
+import tempfile
+
+from src.parser import MediumParser
+from src.transport import RecordingSession, ReplaySession
+from src.writers import RotatingCsvWriter
+
+
+def record(cassette_path: str, link: str) -> None:
+    """
+    Fetch users who liked the post from medium.com and save the responses to a cassette.
+
+    Args:
+        cassette_path (str): The path to the cassette file.
+        link (str): The URL of the post.
+    """
+    session = RecordingSession(cassette_path)
+    parser = MediumParser(app=None, session_factory=lambda: session)
+    users = parser.fetch_users_who_liked_post(link)
+    session.close()
+
+    print(f"{len(users)} users recorded to {cassette_path}")
+
+
+def replay(cassette_path: str, link: str, speed: float = 0, compression: str = None) -> None:
+    """
+    Fetch users who liked the post from a cassette, export them to a file and print the timings.
+
+    Args:
+        cassette_path (str): The path to the cassette file.
+        link (str): The URL of the post, the same as when recording.
+        speed (float, optional): The replay speed relative to the recorded timings. Defaults to 0.
+        compression (str, optional): The compression of the exported file. Defaults to None.
+    """
+    parser = MediumParser(
+        app=None,
+        log_func=lambda *args: None,
+        session_factory=lambda: ReplaySession(cassette_path, speed=speed)
+    )
+
+    start = time.perf_counter()
+    users = parser.fetch_users_who_liked_post(link)
+    fetched = time.perf_counter()
+
+    with tempfile.TemporaryDirectory() as directory:
+        with RotatingCsvWriter(directory, "output", fieldnames=MediumParser.USER_FIELDS, compression=compression) as writer:
+            writer.writerows(users)
+    exported = time.perf_counter()
+
+    print(
+        f"{len(users)} users: fetch {(fetched - start) * 1000:.1f} ms, "
+        f"export {(exported - fetched) * 1000:.1f} ms"
+    )
+
+
+def main():
+    mode, cassette_path, link = sys.argv[1:4]
+    if mode == "record":
+        record(cassette_path, link)
+    elif mode == "replay":
+        replay(
+            cassette_path,
+            link,
+            speed=float(sys.argv[4]) if len(sys.argv) > 4 else 0,
+            compression=sys.argv[5] if len(sys.argv) > 5 else None
+        )
+    else:
+        raise ValueError(f"Unknown mode: {mode}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+The file, that contains audience overlap analytics over the parsed users files
+"""
+import os
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from .writers import iter_rows
+
+
+class AudienceOverlap:
+
+    def __init__(self, matrix: sparse.csr_matrix, users: List[str], posts: List[str]) -> None:
+        """
+        Initialize the AudienceOverlap instance.
+
+        Args:
+            matrix (sparse.csr_matrix): A binary user x post incidence matrix.
+            users (List[str]): Profile links of the users, one per matrix row.
+            posts (List[str]): Labels of the posts, one per matrix column.
+        """
+        if matrix.shape != (len(users), len(posts)):
+            raise ValueError("Matrix shape must be equal to (number of users, number of posts)")
+
+        self.matrix = matrix.tocsr()
+        self.users = users
+        self.posts = posts
+
+        self._post_index = {post: i for i, post in enumerate(posts)}
+
+
+    @classmethod
+    def from_records(cls, records: Iterable[Tuple[str, str]]) -> "AudienceOverlap":
+        """
+        Build the incidence matrix from (profile_link, post) pairs.
+
+        Repeated pairs are counted once.
+
+        Args:
+            records (Iterable[Tuple[str, str]]): Pairs of user profile link and post label.
+
+        Returns:
+            AudienceOverlap: The analytics instance for the given records.
+        """
+        user_index: Dict[str, int] = {}
+        post_index: Dict[str, int] = {}
+        rows = []
+        cols = []
+
+        for user, post in records:
+            rows.append(user_index.setdefault(user, len(user_index)))
+            cols.append(post_index.setdefault(post, len(post_index)))
+
+        return cls(
+            matrix=cls._build_matrix(rows, cols, len(user_index), len(post_index)),
+            users=list(user_index),
+            posts=list(post_index)
+        )
+
+
+    @classmethod
+    def from_files(cls, files: Union[Iterable[str], Dict[str, str]]) -> "AudienceOverlap":
+        """
+        Build the incidence matrix from the users files saved by the parser.
+
+        Every file is treated as the voters of a single post.
+
+        Args:
+            files (Union[Iterable[str], Dict[str, str]]): Paths to the users files or manifests,
+            or a dictionary mapping post labels to paths. When only paths are given, the file
+            name is used as the post label, so the file names must be unique.
+
+        Returns:
+            AudienceOverlap: The analytics instance for the given files.
+
+        Raises:
+            ValueError: If several paths have the same file name.
+        """
+        if not isinstance(files, dict):
+            paths = list(files)
+            files = {os.path.basename(path): path for path in paths}
+            if len(files) != len(paths):
+                raise ValueError("Files must have unique names, pass a dictionary with unique post labels instead")
+
+        user_index: Dict[str, int] = {}
+        rows = []
+        cols = []
+
+        for col, path in enumerate(files.values()):
+            codes = [user_index.setdefault(row["profile_link"], len(user_index)) for row in iter_rows(path)]
+
+            rows.extend(codes)
+            cols.extend([col] * len(codes))
+
+        return cls(
+            matrix=cls._build_matrix(rows, cols, len(user_index), len(files)),
+            users=list(user_index),
+            posts=list(files)
+        )
+
+
+    @staticmethod
+    def _build_matrix(rows: List[int], cols: List[int], n_users: int, n_posts: int) -> sparse.csr_matrix:
+        """
+        Create a binary CSR matrix from the coordinates of its non-zero cells.
+        """
+        matrix = sparse.csr_matrix(
+            (
+                np.ones(len(rows), dtype=np.int32),
+                (np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64))
+            ),
+            shape=(n_users, n_posts)
+        )
+        # Duplicated coordinates are summed on construction
+        matrix.data[:] = 1
+
+        return matrix
+
+
+    def _get_post_column(self, post: str) -> int:
+        if post not in self._post_index:
+            raise KeyError(f"Unknown post: {post}")
+        return self._post_index[post]
+
+
+    def post_counts(self) -> np.ndarray:
+        """
+        Get the number of target posts liked by every user.
+
+        Returns:
+            np.ndarray: An array of counts aligned with `users`.
+        """
+        return np.asarray(self.matrix.sum(axis=1)).ravel()
+
+
+    def voter_counts(self) -> np.ndarray:
+        """
+        Get the number of users who liked every post.
+
+        Returns:
+            np.ndarray: An array of counts aligned with `posts`.
+        """
+        return np.asarray(self.matrix.sum(axis=0)).ravel()
+
+
+    def top_users(self, k: int = 10, min_posts: int = 1) -> List[Tuple[str, int]]:
+        """
+        Get the users who liked the largest number of target posts.
+
+        Args:
+            k (int, optional): The maximum number of users to return. Defaults to 10.
+            min_posts (int, optional): The minimum number of liked posts. Defaults to 1.
+
+        Returns:
+            List[Tuple[str, int]]: Pairs of profile link and number of liked posts, most active first.
+
+        Raises:
+            ValueError: If k is negative.
+        """
+        if k < 0:
+            raise ValueError("k must be a non-negative integer")
+        if k == 0:
+            return []
+
+        counts = self.post_counts()
+        candidates = np.flatnonzero(counts >= min_posts)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-counts[candidates], k - 1)[:k]]
+
+        order = candidates[np.argsort(-counts[candidates], kind="stable")]
+        return [(self.users[i], int(counts[i])) for i in order]
+
+
+    def overlap_matrix(self) -> np.ndarray:
+        """
+        Get the number of common users for every pair of posts.
+
+        Returns:
+            np.ndarray: A dense post x post matrix, the diagonal holds the number of voters of the post.
+        """
+        return (self.matrix.T @ self.matrix).toarray()
+
+
+    def jaccard_matrix(self) -> np.ndarray:
+        """
+        Get the Jaccard similarity of the audiences for every pair of posts.
+
+        Returns:
+            np.ndarray: A dense post x post matrix of similarities in range [0, 1].
+        """
+        intersection = self.overlap_matrix().astype(np.float64)
+        sizes = np.diag(intersection)
+        union = sizes[:, None] + sizes[None, :] - intersection
+
+        return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+
+    def top_similar_posts(self, post: str, k: int = 5) -> List[Tuple[str, float]]:
+        """
+        Get the posts whose audience is the most similar to the audience of the given post.
+
+        Args:
+            post (str): The label of the post.
+            k (int, optional): The maximum number of posts to return. Defaults to 5.
+
+        Returns:
+            List[Tuple[str, float]]: Pairs of post label and Jaccard similarity, most similar first.
+
+        Raises:
+            ValueError: If k is negative.
+        """
+        if k < 0:
+            raise ValueError("k must be a non-negative integer")
+
+        col = self._get_post_column(post)
+
+        column = self.matrix[:, col]
+        intersection = (self.matrix.T @ column).toarray().ravel().astype(np.float64)
+        sizes = self.voter_counts()
+        union = sizes + sizes[col] - intersection
+        similarity = np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+        similarity[col] = -1
+        k = min(k, len(self.posts) - 1)
+        if k <= 0:
+            return []
+
+        candidates = np.argpartition(-similarity, k - 1)[:k]
+        order = candidates[np.argsort(-similarity[candidates], kind="stable")]
+        return [(self.posts[i], float(similarity[i])) for i in order]
+
+
+    def common_users(self, posts: Optional[List[str]] = None) -> List[str]:
+        """
+        Get the users who liked all of the given posts.
+
+        Args:
+            posts (List[str], optional): The labels of the posts. Defaults to all posts.
+
+        Returns:
+            List[str]: Profile links of the users.
+        """
+        cols = [self._get_post_column(post) for post in posts] if posts else list(range(len(self.posts)))
+        counts = np.asarray(self.matrix[:, cols].sum(axis=1)).ravel()
+
+        return [self.users[i] for i in np.flatnonzero(counts == len(cols))]
+
+
+    def post_clusters(self, threshold: float = 0.1) -> List[List[str]]:
+        """
+        Group the posts into clusters with overlapping audiences.
+
+        Two posts end up in the same cluster if they are connected by a chain of
+        posts with a pairwise Jaccard similarity of at least `threshold`.
+
+        Args:
+            threshold (float, optional): The minimum similarity to link two posts. Defaults to 0.1.
+
+        Returns:
+            List[List[str]]: The clusters of post labels, largest first.
+        """
+        adjacency = sparse.csr_matrix(self.jaccard_matrix() >= threshold)
+        n_clusters, labels = connected_components(adjacency, directed=False)
+
+        clusters = [[] for _ in range(n_clusters)]
+        for post, label in zip(self.posts, labels):
+            clusters[label].append(post)
+
+        return sorted(clusters, key=len, reverse=True)
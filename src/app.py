@@ -1,16 +1,24 @@
-import os
 import time
-import csv
 from datetime import datetime
 
 import threading
 
 from .parser import MediumParser
+from .enrichment import ProfileEnricher
 from .ui import AppWindow
+from .writers import RotatingCsvWriter
 
 
 class App(AppWindow):
     
+    # Settings of the parsed users files: None, "gzip" or "zstd", and limits of a single part
+    OUTPUT_COMPRESSION = None
+    OUTPUT_MAX_ROWS = None
+    OUTPUT_MAX_BYTES = None
+    
+    # Whether to add the name, bio and number of followers of every user to the output
+    ENRICH_PROFILES = False
+    
     def __init__(self) -> None:
         super().__init__()
         self.parser = MediumParser(
@@ -33,20 +41,34 @@ class App(AppWindow):
             self.parser.initialize_driver(
                 proxies=self.proxy
             )
-            file_path = os.path.join(self.save_directory, f"output_{datetime.now().strftime(r'%Y-%m-%d_%H-%M')}.csv")
+            fieldnames = list(MediumParser.USER_FIELDS)
+            users = self.parser.iter_users_who_liked_post(self.link)
+            enricher = None
+            if self.ENRICH_PROFILES:
+                enricher = ProfileEnricher(self.parser)
+                fieldnames += ProfileEnricher.PROFILE_FIELDS
+                users = enricher.enrich(users)
+            
+            writer = RotatingCsvWriter(
+                directory=self.save_directory,
+                prefix=f"output_{datetime.now().strftime(r'%Y-%m-%d_%H-%M')}",
+                fieldnames=fieldnames,
+                compression=self.OUTPUT_COMPRESSION,
+                max_rows=self.OUTPUT_MAX_ROWS,
+                max_bytes=self.OUTPUT_MAX_BYTES
+            )
             
-            with open(file_path, 'w', newline='') as output_file:
-                fieldnames = ["profile_link", "posts"]
-                dict_writer = csv.DictWriter(output_file, fieldnames=fieldnames)
-                dict_writer.writeheader()
-                
-                
-                users = self.parser.fetch_users_who_liked_post(self.link)
-                for user in users:
-                    dict_writer.writerows([user])
+            try:
+                with writer:
+                    writer.writerows(users)
+            finally:
+                if enricher is not None:
+                    # Closing the stream first waits for the running lookups, then the cache can be closed
+                    users.close()
+                    enricher.close()
                     
             end = time.time()
-            self.log(f"[SUCCESS] {len(users)} users collected. Took {(end-start):.2f} seconds, saved to {file_path}")
+            self.log(f"[SUCCESS] {sum(part['rows'] for part in writer.parts)} users collected. Took {(end-start):.2f} seconds, saved {len(writer.parts)} file(s), manifest: {writer.manifest_path}")
         
         except Exception as e:
             self.log(f"[ERROR] {e}")
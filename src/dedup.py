@@ -0,0 +1,217 @@
+"""
+The file, that contains deduplicators for the stream of parsed users
+"""
+import math
+import hashlib
+from array import array
+from abc import ABC, abstractmethod
+
+
+def hash_key(key: str) -> int:
+    """
+    Hash a key (e.g. a profile link) into a non-zero 64-bit integer id.
+
+    Args:
+        key (str): The key to hash.
+
+    Returns:
+        int: The 64-bit id of the key. Zero is never returned, it marks empty slots.
+    """
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+class Deduplicator(ABC):
+    """
+    Base class for the deduplicators of parsed users.
+    """
+
+    @abstractmethod
+    def add(self, key: str) -> bool:
+        """
+        Remember the key.
+
+        Args:
+            key (str): The key to remember.
+
+        Returns:
+            bool: True if the key was not seen before, False otherwise.
+        """
+
+
+    @abstractmethod
+    def __contains__(self, key: str) -> bool: pass
+
+
+    @abstractmethod
+    def __len__(self) -> int: pass
+
+
+    @property
+    @abstractmethod
+    def memory_usage(self) -> int:
+        """The number of bytes used by the underlying storage."""
+
+
+class ExactDeduplicator(Deduplicator):
+    """
+    Exact deduplicator, that keeps 64-bit ids of the keys in an open addressing hash set.
+
+    Two different keys are considered equal only on a 64-bit hash collision,
+    which is negligible for any realistic number of users.
+    """
+
+    _MAX_LOAD = 0.5
+
+    def __init__(self, capacity: int = 1024) -> None:
+        """
+        Initialize the ExactDeduplicator instance.
+
+        Args:
+            capacity (int, optional): The expected number of keys. Defaults to 1024.
+        """
+        size = 8
+        while size * self._MAX_LOAD < capacity:
+            size *= 2
+
+        self._slots = array("Q", bytes(8 * size))
+        self._mask = size - 1
+        self._count = 0
+
+
+    def _find(self, key_id: int) -> int:
+        """
+        Find the slot holding the id or the empty slot where it should be inserted.
+        """
+        slots = self._slots
+        mask = self._mask
+        i = key_id & mask
+        while True:
+            value = slots[i]
+            if value == 0 or value == key_id:
+                return i
+            i = (i + 1) & mask
+
+
+    def _grow(self) -> None:
+        old_slots = self._slots
+        self._slots = array("Q", bytes(16 * len(old_slots)))
+        self._mask = len(self._slots) - 1
+
+        for key_id in old_slots:
+            if key_id:
+                self._slots[self._find(key_id)] = key_id
+
+
+    def add(self, key: str) -> bool:
+        key_id = hash_key(key)
+        i = self._find(key_id)
+        if self._slots[i]:
+            return False
+
+        self._slots[i] = key_id
+        self._count += 1
+        if self._count > len(self._slots) * self._MAX_LOAD:
+            self._grow()
+
+        return True
+
+
+    def __contains__(self, key: str) -> bool:
+        return self._slots[self._find(hash_key(key))] != 0
+
+
+    def __len__(self) -> int:
+        return self._count
+
+
+    @property
+    def memory_usage(self) -> int:
+        return self._slots.itemsize * len(self._slots)
+
+
+class BloomDeduplicator(Deduplicator):
+    """
+    Approximate deduplicator based on a Bloom filter.
+
+    It never lets a duplicate through, but may drop a new key with the
+    configured false positive rate.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001) -> None:
+        """
+        Initialize the BloomDeduplicator instance.
+
+        Args:
+            capacity (int): The expected number of keys.
+            error_rate (float, optional): The false positive rate at the expected number of keys. Defaults to 0.001.
+        """
+        if capacity <= 0:
+            raise ValueError("Capacity must be a positive integer")
+        if not 0 < error_rate < 1:
+            raise ValueError("Error rate must be between 0 and 1")
+
+        self._size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self._hash_count = max(1, round(self._size / capacity * math.log(2)))
+        self._bits = bytearray((self._size + 7) // 8)
+        self._count = 0
+
+
+    def _positions(self, key: str) -> list[int]:
+        """
+        Get the bit positions of the key using double hashing.
+        """
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+
+        return [(h1 + i * h2) % self._size for i in range(self._hash_count)]
+
+
+    def add(self, key: str) -> bool:
+        bits = self._bits
+        is_new = False
+        for position in self._positions(key):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                is_new = True
+
+        if is_new:
+            self._count += 1
+        return is_new
+
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+    def __len__(self) -> int:
+        """The number of keys reported as new."""
+        return self._count
+
+
+    @property
+    def memory_usage(self) -> int:
+        return len(self._bits)
+
+
+def create_deduplicator(mode: str = "exact", capacity: int = 1024, error_rate: float = 0.001) -> Deduplicator:
+    """
+    Create a deduplicator for the given mode.
+
+    Args:
+        mode (str, optional): "exact" or "bloom". Defaults to "exact".
+        capacity (int, optional): The expected number of keys. Defaults to 1024.
+        error_rate (float, optional): The false positive rate for the "bloom" mode. Defaults to 0.001.
+
+    Returns:
+        Deduplicator: The created deduplicator.
+    """
+    if mode == "exact":
+        return ExactDeduplicator(capacity=capacity)
+    if mode == "bloom":
+        return BloomDeduplicator(capacity=capacity, error_rate=error_rate)
+
+    raise ValueError(f"Unknown deduplication mode: {mode}")
@@ -0,0 +1,263 @@
+"""
+The file, that contains the enrichment stage, adding profile data to the parsed users
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional
+
+import requests
+
+from .parser import MediumParser
+
+
+class ProfileCache:
+    """
+    Local store of fetched user profiles, each kept for a limited time.
+
+    Users without a profile (deleted or suspended) are stored as well, so they
+    are not requested again until their entry expires.
+    """
+
+    def __init__(
+        self,
+        path: str = os.path.join(os.path.dirname(__file__), "cache", "profiles.sqlite3"),
+        ttl: float = 7 * 24 * 60 * 60,
+        missing_ttl: float = 24 * 60 * 60
+    ) -> None:
+        """
+        Initialize the ProfileCache instance.
+
+        Args:
+            path (str, optional): The path to the SQLite database, ":memory:" keeps the profiles
+            only for the lifetime of the instance. Defaults to "cache/profiles.sqlite3" inside the package.
+            ttl (float, optional): The time in seconds a profile stays valid. Defaults to a week.
+            missing_ttl (float, optional): The time in seconds a user without a profile stays valid. Defaults to a day.
+        """
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self.ttl = ttl
+        self.missing_ttl = missing_ttl
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS profiles (user_id TEXT PRIMARY KEY, profile TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self._connection.commit()
+
+
+    def get_many(self, user_ids: List[str]) -> Dict[str, Optional[Dict[str, str]]]:
+        """
+        Get the entries, that are in the cache and not expired.
+
+        Args:
+            user_ids (List[str]): The ids of the users.
+
+        Returns:
+            Dict[str, Optional[Dict[str, str]]]: Profiles by user id, None for users without a profile.
+        """
+        if not user_ids:
+            return {}
+
+        now = time.time()
+        placeholders = ", ".join("?" * len(user_ids))
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT user_id, profile FROM profiles "
+                "WHERE fetched_at >= CASE WHEN profile = 'null' THEN ? ELSE ? END "
+                f"AND user_id IN ({placeholders})",
+                [now - self.missing_ttl, now - self.ttl, *user_ids]
+            ).fetchall()
+
+        return {user_id: json.loads(profile) for user_id, profile in rows}
+
+
+    def set_many(self, profiles: Dict[str, Optional[Dict[str, str]]]) -> None:
+        """
+        Save the entries to the cache.
+
+        Args:
+            profiles (Dict[str, Optional[Dict[str, str]]]): Profiles by user id, None for users without a profile.
+        """
+        fetched_at = time.time()
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO profiles (user_id, profile, fetched_at) VALUES (?, ?, ?)",
+                [(user_id, json.dumps(profile), fetched_at) for user_id, profile in profiles.items()]
+            )
+            self._connection.commit()
+
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class ProfileEnricher:
+    """
+    Streaming stage, that adds the name, bio and number of followers to the parsed users.
+
+    Users are grouped into batches, the profiles of a batch are fetched in the
+    background while the next pages of voters are being parsed. Users found in
+    the cache, or already being fetched by another batch, are not requested again
+    until their cache entry expires. Users of a failed request are not cached.
+    """
+
+    PROFILE_FIELDS = ["name", "bio", "followers"]
+
+    def __init__(
+        self,
+        parser: MediumParser,
+        cache: Optional[ProfileCache] = None,
+        batch_size: int = 50,
+        max_workers: int = 2,
+        log_func: Callable[..., None] = None
+    ) -> None:
+        """
+        Initialize the ProfileEnricher instance.
+
+        Args:
+            parser (MediumParser): The parser used to fetch the profiles.
+            cache (ProfileCache, optional): The profiles cache, left open by `close`. Defaults to
+            a new ProfileCache(), closed by `close`.
+            batch_size (int, optional): The number of users in a single request. Defaults to 50.
+            max_workers (int, optional): The number of requests running at the same time. Defaults to 2.
+            log_func (Callable[..., None], optional): A function for logging messages. Defaults to the parser log.
+        """
+        self.parser = parser
+        self._owns_cache = cache is None
+        self.cache = cache or ProfileCache()
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.log = log_func or parser.log
+
+
+    def _fetch(self, user_ids: List[str], session: requests.Session) -> Dict[str, Optional[Dict[str, str]]]:
+        try:
+            profiles = self.parser.fetch_user_profiles(user_ids, session=session)
+        except Exception as e:
+            self.log(f"[ERROR] enrichment._fetch {e}")
+            return {}
+
+        # A failed request is not cached, so its users are requested again by the following batches
+        if profiles is None:
+            return {}
+
+        # Users returned without a profile are cached as None, so they are not requested by every batch
+        self.cache.set_many(profiles)
+        return profiles
+
+
+    def enrich(self, users: Iterable[Dict[str, str]]) -> Iterator[Dict[str, str]]:
+        """
+        Add profile fields to the users, keeping their order.
+
+        At most `max_workers * 2` batches are kept in memory, if the profiles are
+        fetched slower than the users are parsed, the parsing waits for them.
+
+        Args:
+            users (Iterable[Dict[str, str]]): The users with "user_id", e.g. from
+            `MediumParser.iter_users_who_liked_post`.
+
+        Yields:
+            Dict[str, str]: The users with the PROFILE_FIELDS added, empty if the profile couldn't be fetched.
+        """
+        # Batches waiting to be yielded: users, entries from the cache and futures of the profiles being fetched
+        pending: Deque[tuple] = deque()
+        max_pending = self.max_workers * 2
+        in_flight: Dict[str, Future] = {}
+        batch: List[Dict[str, str]] = []
+        fetched = cached = 0
+
+        # Every worker thread reuses its own session
+        local = threading.local()
+        sessions: List[requests.Session] = []
+        sessions_lock = threading.Lock()
+
+        def fetch(user_ids: List[str]) -> Dict[str, Optional[Dict[str, str]]]:
+            if not hasattr(local, "session"):
+                local.session = self.parser.create_session()
+                with sessions_lock:
+                    sessions.append(local.session)
+            return self._fetch(user_ids, local.session)
+
+        def submit(executor: ThreadPoolExecutor) -> None:
+            nonlocal fetched, cached
+
+            user_ids = list(dict.fromkeys(user["user_id"] for user in batch))
+            profiles = self.cache.get_many(user_ids)
+            new_ids = [user_id for user_id in user_ids if user_id not in profiles and user_id not in in_flight]
+
+            if new_ids:
+                future = executor.submit(fetch, new_ids)
+                for user_id in new_ids:
+                    in_flight[user_id] = future
+
+            futures = {user_id: in_flight[user_id] for user_id in user_ids if user_id not in profiles}
+
+            fetched += len(new_ids)
+            cached += len(profiles)
+            pending.append((batch, profiles, futures))
+
+        def merge() -> List[Dict[str, str]]:
+            batch_users, profiles, futures = pending.popleft()
+
+            for user in batch_users:
+                user_id = user["user_id"]
+                profile = profiles.get(user_id)
+                if profile is None and user_id in futures:
+                    profile = futures[user_id].result().get(user_id)
+                user.update(profile or dict.fromkeys(self.PROFILE_FIELDS, ""))
+
+            # The fetched entries are in the cache now, the following batches will find them there
+            for user_id, future in futures.items():
+                if in_flight.get(user_id) is future:
+                    del in_flight[user_id]
+
+            return batch_users
+
+        def is_ready() -> bool:
+            return all(future.done() for future in pending[0][2].values())
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for user in users:
+                    batch.append(user)
+                    if len(batch) >= self.batch_size:
+                        submit(executor)
+                        batch = []
+
+                    while pending and (len(pending) >= max_pending or is_ready()):
+                        yield from merge()
+
+                if batch:
+                    submit(executor)
+
+                while pending:
+                    yield from merge()
+        finally:
+            for session in sessions:
+                session.close()
+
+        self.log(f"[INFO] Profiles enriched: {fetched} fetched, {cached} from cache")
+
+
+    def close(self) -> None:
+        """
+        Close the profiles cache, if it was created by the enricher.
+        """
+        if self._owns_cache:
+            self.cache.close()
+
+
+    def __enter__(self) -> "ProfileEnricher":
+        return self
+
+
+    def __exit__(self, *args) -> None:
+        self.close()
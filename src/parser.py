@@ -1,9 +1,8 @@
 import json
 import os
 import re
-import csv
 import time
-from typing import Dict, Callable, Optional
+from typing import Dict, Callable, Iterator, List, Optional
 
 import imaplib
 import email
@@ -18,16 +17,30 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.common.exceptions import TimeoutException
 
+from .dedup import Deduplicator
+from .writers import iter_rows
+
 
 class MediumParser:
 
-    def __init__(self, app, log_func: Callable[..., None] = None, show_window: bool = False) -> None:
+    # Columns of the parsed users files
+    USER_FIELDS = ["profile_link", "user_id", "posts"]
+
+    def __init__(
+        self,
+        app,
+        log_func: Callable[..., None] = None,
+        show_window: bool = False,
+        session_factory: Callable[[], requests.Session] = None
+    ) -> None:
         """
         Initialize the MediumParser instance.
 
         Args:
             log_func (Callable[..., None], optional): A function for logging messages. Defaults to print.
             show_window (bool, optional): Whether to display the browser window. Defaults to False.
+            session_factory (Callable[[], requests.Session], optional): A function creating the HTTP
+            session for fetching users, e.g. a recording or replaying one from `transport`. Defaults to requests.Session.
         """
         
         self.app = app
@@ -36,6 +49,7 @@ class MediumParser:
         self.log = log_func or print
         
         self._show_window = show_window
+        self._session_factory = session_factory or requests.Session
         
         self._driver = None
         self._proxy_config = None
@@ -229,6 +243,20 @@ chrome.webRequest.onAuthRequired.addListener(
         
         return headers
             
+    def _read_query(self, file_name: str) -> str:
+        """
+        Read a GraphQL query from the graphql_queries folder.
+
+        Args:
+            file_name (str): The name of the .gql file.
+
+        Returns:
+            str: The text of the query.
+        """
+        with open(os.path.join(os.path.dirname(__file__), "graphql_queries", file_name)) as f:
+            return f.read()
+    
+    
     def _get_proxies(self) -> Dict[str, str]:
         """
         Retrieve the proxy configuration for HTTP requests.
@@ -236,6 +264,9 @@ chrome.webRequest.onAuthRequired.addListener(
         Returns:
             Dict[str, str]: A dictionary containing the proxy settings formatted for use with requests.
         """
+        if not self._proxy_config:
+            return {}
+        
         proxy =  f'http://{self._proxy_config["login"]}:{self._proxy_config["password"]}@{self._proxy_config["host"]}:{self._proxy_config["port"]}'
         proxies = {
             "http": proxy,
@@ -265,31 +296,45 @@ chrome.webRequest.onAuthRequired.addListener(
         return driver_cookies
     
 
-    def fetch_users_who_liked_post(self, link: str) -> list[Dict[str, str]]:
+    def fetch_users_who_liked_post(self, link: str, dedup: Optional[Deduplicator] = None) -> list[Dict[str, str]]:
         """
         Fetch users who liked a specific post.
 
         Args:
             link (str): The URL of the post to fetch the likers for.
+            dedup (Deduplicator, optional): A deduplicator shared between several posts, users
+            whose profile link was already seen are skipped. Defaults to None.
 
         Returns:
-            List[Dict[str, Union[str, List[Dict[str, str]]]]]: A list of users who liked the post, each containing their profile link and posts.
+            List[Dict[str, Union[str, List[Dict[str, str]]]]]: A list of users who liked the post, each containing their profile link, id and posts.
+        """
+        return list(self.iter_users_who_liked_post(link, dedup=dedup))
+    
+    
+    def iter_users_who_liked_post(self, link: str, dedup: Optional[Deduplicator] = None) -> Iterator[Dict[str, str]]:
+        """
+        Fetch users who liked a specific post page by page.
+
+        Args:
+            link (str): The URL of the post to fetch the likers for.
+            dedup (Deduplicator, optional): A deduplicator shared between several posts, users
+            whose profile link was already seen are skipped. Defaults to None.
+
+        Yields:
+            Dict[str, str]: The users who liked the post, as soon as their page is fetched.
         """
         
         if not isinstance(link, str):
-            self.log(f"[ERROR] parser.fetch_users_who_liked_post: Link must be a string")
+            self.log(f"[ERROR] parser.iter_users_who_liked_post: Link must be a string")
         if not link.startswith("http"):
             link = "https://" + link 
         
         # Getting query
-        with open('src\\graphql_queries\\fetch_users.gql') as f:
-            query = f.read()
+        query = self._read_query("fetch_users.gql")
         
         operation_name = "PostVotersDialogQuery"
                 
         post_id = link.split("-")[-1]
-        all_users = []
-        next_page = None
 
         headers = self._get_headers(for_link=link, graph_ql_operation="PostVotersDialogQuery")
         
@@ -304,7 +349,7 @@ chrome.webRequest.onAuthRequired.addListener(
             }
         }
         
-        session = requests.Session()
+        session = self.create_session()
         while True:
                     
             response = session.post(
@@ -316,16 +361,11 @@ chrome.webRequest.onAuthRequired.addListener(
             )
 
             if not response.ok:
-                self.log(f"[ERROR] parser._fetch_users_who_liked_post Something went wrong, can't get users. Status code: {response.status_code}")
-                return all_users
+                self.log(f"[ERROR] parser.iter_users_who_liked_post Something went wrong, can't get users. Status code: {response.status_code}")
+                return
 
             self.log("[SUCCESS] Parsing...")
 
-            
-            #If there is a next page, include it in the request
-            if next_page:
-                variables["pagingOptions"]["page"] = next_page
-
             # Parse the response
             data = response.json()
             voters = data['data']['post']['voters']['items']
@@ -340,6 +380,10 @@ chrome.webRequest.onAuthRequired.addListener(
                     else:
                         result["profile_link"] = f"https://medium.com/@{user['username']}"
 
+                    if dedup is not None and not dedup.add(result["profile_link"]):
+                        continue
+
+                    result["user_id"] = user["id"]
                     result["posts"] = []
                     for post in user["homepagePostsConnection"]["posts"]:
                         post = {
@@ -352,22 +396,101 @@ chrome.webRequest.onAuthRequired.addListener(
                     users.append(result)
                     
                     
-            all_users.extend(users)
+            yield from users
 
             # Check for the next page
             next_page_info = data['data']['post']['voters']['pagingInfo']['next']
             if next_page_info:
-                next_page = next_page_info['page']
+                # Include the next page in the following request
+                variables["pagingOptions"]["page"] = next_page_info['page']
             else:
                 break  # Exit the loop if there are no more pages
+    
+    
+    def create_session(self) -> requests.Session:
+        """
+        Create a new HTTP session with the configured session factory.
+
+        Returns:
+            requests.Session: The created session, the caller is responsible for closing it.
+        """
+        return self._session_factory()
+    
+    
+    def fetch_user_profiles(
+        self,
+        user_ids: List[str],
+        session: Optional[requests.Session] = None
+    ) -> Optional[Dict[str, Optional[Dict[str, str]]]]:
+        """
+        Fetch profiles of several users in a single GraphQL request.
+
+        Args:
+            user_ids (List[str]): The ids of the users.
+            session (requests.Session, optional): The session to send the request with, it is
+            left open. Defaults to a new session, closed after the request.
 
-        return all_users     
+        Returns:
+            Optional[Dict[str, Optional[Dict[str, str]]]]: Profiles by user id, each containing the
+            name, bio and number of followers, None for users returned as null (deleted or
+            suspended). None if the request failed, e.g. was rate limited.
+        """
+        if not user_ids:
+            return {}
+        
+        if session is None:
+            with self.create_session() as session:
+                return self.fetch_user_profiles(user_ids, session=session)
+        
+        fragment = self._read_query("user_profile.gql")
+        
+        operation_name = "UserProfilesQuery"
+        
+        # Every user is requested under its own alias, so the whole batch fits into one query
+        arguments = ", ".join(f"$id{i}: ID!" for i in range(len(user_ids)))
+        selections = "\n".join(f"    u{i}: user(id: $id{i}) {{ ...userProfile_user }}" for i in range(len(user_ids)))
+        query = f"query {operation_name}({arguments}) {{\n{selections}\n}}\n\n{fragment}"
+        
+        variables = {f"id{i}": user_id for i, user_id in enumerate(user_ids)}
+        
+        response = session.post(
+            'https://medium.com/_/graphql',
+            json={"operationName": operation_name, 'query': query, 'variables': variables},
+            headers=self._get_headers(graph_ql_operation=operation_name),
+            proxies=self._get_proxies(),
+        )
+        
+        if not response.ok:
+            self.log(f"[ERROR] parser.fetch_user_profiles Something went wrong, can't get profiles. Status code: {response.status_code}")
+            return None
+        
+        body = response.json()
+        data = body.get("data")
+        if not data:
+            self.log(f"[ERROR] parser.fetch_user_profiles Something went wrong, can't get profiles: {body.get('errors')}")
+            return None
+        
+        # With errors in the response a null user may be a failure rather than a missing profile
+        has_errors = bool(body.get("errors"))
+        
+        profiles = {}
+        for i, user_id in enumerate(user_ids):
+            user = data.get(f"u{i}")
+            if user:
+                profiles[user_id] = {
+                    "name": user.get("name"),
+                    "bio": user.get("bio"),
+                    "followers": (user.get("socialStats") or {}).get("followerCount"),
+                }
+            elif f"u{i}" in data and not has_errors:
+                profiles[user_id] = None
+        
+        return profiles
     
     
     def _login(self):
         
-        with open('src\\graphql_queries\\send_activation.gql') as f:
-            query = f.read()
+        query = self._read_query("send_activation.gql")
         
         operation_name = "SendAcctAuthEmail"
         
@@ -426,8 +549,7 @@ chrome.webRequest.onAuthRequired.addListener(
         if not self._is_logged:
             self._login()
         
-        with open("src\\graphql_queries\\clap.gql") as f:
-            query = f.read()
+        query = self._read_query("clap.gql")
             
         operation_name = "ClapMutation"
         
@@ -435,41 +557,38 @@ chrome.webRequest.onAuthRequired.addListener(
 
         cookies = {}
         
-        with open(from_file, 'r') as f:
-            reader = csv.DictReader(f)
+        for i, row in enumerate(iter_rows(from_file)):
+            user_link = row["profile_link"]
+            posts = json.loads(row["posts"])
             
-            for i, row in enumerate(reader):
-                user_link = row["profile_link"]
-                posts = json.loads(row["posts"])
-                
-                post = posts[0]
+            post = posts[0]
 
-                headers = self._get_headers(for_link=post["url"], graph_ql_operation=operation_name)
+            headers = self._get_headers(for_link=post["url"], graph_ql_operation=operation_name)
 
-                if not cookies:
-                    cookies = self._get_cookies(post["url"])
+            if not cookies:
+                cookies = self._get_cookies(post["url"])
+            
+            variables = {
+                'targetPostId': post["id"],
+                'userId': cookies["uid"],
+                'numClaps': 1,
+            }    
                 
-                variables = {
-                    'targetPostId': post["id"],
-                    'userId': cookies["uid"],
-                    'numClaps': 1,
-                }    
-                    
-                while True:
-                    response = requests.post(
-                        'https://medium.com/_/graphql', 
-                        json={"operationName": operation_name, 'query': query, 'variables': variables},
-                        headers=headers, 
-                        proxies=proxies,
-                        cookies=cookies, 
-                    )
-                    
-                    if response.ok:
-                        self.log(f"[SUCCESS][{i}] liked {user_link}")
-                        break
-                    else:
-                        self.log(f"[ERROR] Couldn't like {user_link}: {response}, trying again...")
-                        cookies = self._get_page_cookies(post["url"])
+            while True:
+                response = requests.post(
+                    'https://medium.com/_/graphql', 
+                    json={"operationName": operation_name, 'query': query, 'variables': variables},
+                    headers=headers, 
+                    proxies=proxies,
+                    cookies=cookies, 
+                )
+                
+                if response.ok:
+                    self.log(f"[SUCCESS][{i}] liked {user_link}")
+                    break
+                else:
+                    self.log(f"[ERROR] Couldn't like {user_link}: {response}, trying again...")
+                    cookies = self._get_page_cookies(post["url"])
     
     def _load_page(self, link: str, timeout: int = 30) -> None:        
         """
@@ -0,0 +1,147 @@
+"""
+The file, that contains record/replay sessions for the parser HTTP calls
+"""
+import json
+import time
+import hashlib
+import threading
+from collections import defaultdict, deque
+from datetime import timedelta
+from typing import Any, Deque, Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+# Headers, that must not be saved to a cassette file
+_SKIPPED_HEADERS = {"set-cookie", "content-encoding", "content-length", "transfer-encoding"}
+
+
+def _request_key(method: str, url: str, body: Optional[Dict[str, Any]]) -> str:
+    """
+    Build the key used to match a replayed request with a recorded one.
+
+    The GraphQL query is included with its whitespace collapsed, so reformatting
+    the .gql files keeps the cassettes valid, while changing the requested fields
+    requires the cassettes to be recorded again.
+    """
+    body = body or {}
+    query = " ".join((body.get("query") or "").split())
+    return json.dumps(
+        [
+            method.upper(),
+            url,
+            body.get("operationName"),
+            hashlib.sha1(query.encode("utf-8")).hexdigest(),
+            body.get("variables")
+        ],
+        sort_keys=True
+    )
+
+
+class RecordingSession(requests.Session):
+    """
+    Session, that sends real requests and appends every interaction to a cassette file.
+
+    The cassette is a JSON Lines file, one interaction per line. Request headers,
+    cookies and proxies are not saved. The session may be shared between threads.
+    """
+
+    def __init__(self, cassette_path: str) -> None:
+        """
+        Initialize the RecordingSession instance.
+
+        Args:
+            cassette_path (str): The path to the cassette file. It is overwritten.
+        """
+        super().__init__()
+        self.cassette_path = cassette_path
+        self._cassette = open(cassette_path, "w", encoding="utf-8")
+        self._lock = threading.Lock()
+
+
+    def request(self, method: str, url: str, *args, **kwargs) -> requests.Response:
+        # The variables may be mutated by the caller after the call, so the key is built first
+        key = _request_key(method, url, kwargs.get("json"))
+
+        response = super().request(method, url, *args, **kwargs)
+
+        interaction = {
+            "key": key,
+            "response": {
+                "status_code": response.status_code,
+                "url": response.url,
+                "headers": {k: v for k, v in response.headers.items() if k.lower() not in _SKIPPED_HEADERS},
+                "body": response.text,
+                "elapsed": response.elapsed.total_seconds(),
+            }
+        }
+        with self._lock:
+            self._cassette.write(json.dumps(interaction) + "\n")
+            self._cassette.flush()
+
+        return response
+
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._cassette.closed:
+                self._cassette.close()
+        super().close()
+
+
+class ReplaySession(requests.Session):
+    """
+    Session, that serves responses from a cassette file without network access.
+
+    Requests are matched by method, url, GraphQL operation name, query and variables.
+    Identical requests are served in the order they were recorded.
+    """
+
+    def __init__(self, cassette_path: str, speed: float = 0) -> None:
+        """
+        Initialize the ReplaySession instance.
+
+        Args:
+            cassette_path (str): The path to the cassette file.
+            speed (float, optional): The replay speed relative to the recorded timings,
+            e.g. 1 replays at the recorded speed and 10 is ten times faster. 0 disables
+            the delays. Defaults to 0.
+        """
+        super().__init__()
+        if speed < 0:
+            raise ValueError("Speed must be a non-negative number")
+
+        self.speed = speed
+        self._interactions: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+
+        with open(cassette_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    interaction = json.loads(line)
+                    self._interactions[interaction["key"]].append(interaction["response"])
+
+
+    def request(self, method: str, url: str, *args, **kwargs) -> requests.Response:
+        key = _request_key(method, url, kwargs.get("json"))
+
+        recorded = self._interactions.get(key)
+        if not recorded:
+            raise LookupError(
+                f"No recorded response for {method} {url}: {key}. "
+                "If the GraphQL query has changed since the cassette was recorded, record it again"
+            )
+        recorded = recorded.popleft()
+
+        if self.speed:
+            time.sleep(recorded["elapsed"] / self.speed)
+
+        response = requests.Response()
+        response.status_code = recorded["status_code"]
+        response.url = recorded["url"]
+        response.headers = CaseInsensitiveDict(recorded["headers"])
+        response.encoding = "utf-8"
+        response._content = recorded["body"].encode("utf-8")
+        response.elapsed = timedelta(seconds=recorded["elapsed"])
+
+        return response
@@ -0,0 +1,260 @@
+"""
+The file, that contains writers and readers of the parsed users files
+"""
+import io
+import os
+import csv
+import gzip
+import json
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional
+
+
+_EXTENSIONS = {
+    None: "",
+    "gzip": ".gz",
+    "zstd": ".zst",
+}
+
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+def _import_zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd compression requires the zstandard package: pip install zstandard")
+    return zstandard
+
+
+def open_part(path: str) -> IO[str]:
+    """
+    Open a users file for reading, decompressing it according to its extension.
+
+    Args:
+        path (str): The path to the file (.csv, .csv.gz or .csv.zst).
+
+    Returns:
+        IO[str]: A text stream suitable for csv.DictReader.
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", newline="", encoding="utf-8")
+    if path.endswith(".zst"):
+        zstandard = _import_zstd()
+        raw = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        return io.TextIOWrapper(raw, newline="", encoding="utf-8")
+
+    return open(path, "r", newline="", encoding="utf-8")
+
+
+def read_manifest(path: str, allow_incomplete: bool = False) -> List[str]:
+    """
+    Get the paths to the parts listed in a manifest.
+
+    Args:
+        path (str): The path to the manifest file.
+        allow_incomplete (bool, optional): Whether to accept a manifest of a run, that failed
+        midway. Defaults to False.
+
+    Returns:
+        List[str]: The absolute paths to the parts, in the order they were written.
+
+    Raises:
+        ValueError: If the manifest is incomplete and allow_incomplete is False.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    if not manifest.get("complete", True) and not allow_incomplete:
+        raise ValueError(f"Manifest {path} is incomplete, the run that wrote it has failed")
+
+    directory = os.path.dirname(os.path.abspath(path))
+    return [os.path.join(directory, part["file"]) for part in manifest["parts"]]
+
+
+def iter_rows(path: str, allow_incomplete: bool = False) -> Iterator[Dict[str, str]]:
+    """
+    Iterate over the rows of a users file or of all parts of a manifest.
+
+    Args:
+        path (str): The path to a users file or to a manifest.
+        allow_incomplete (bool, optional): Whether to accept an incomplete manifest. Defaults to False.
+
+    Yields:
+        Dict[str, str]: The rows of the file.
+    """
+    parts = read_manifest(path, allow_incomplete=allow_incomplete) if path.endswith(MANIFEST_SUFFIX) else [path]
+
+    for part in parts:
+        with open_part(part) as f:
+            yield from csv.DictReader(f)
+
+
+class RotatingCsvWriter:
+    """
+    CSV writer, that streams rows into optionally compressed files, starting a new
+    part when the row or size limit is reached.
+
+    Every part has its own header, so the parts can be read independently. On close
+    a manifest listing the parts is written next to them. When used as a context manager
+    and the block raises, the manifest is written with "complete": false.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        prefix: str,
+        fieldnames: List[str],
+        compression: Optional[str] = None,
+        max_rows: Optional[int] = None,
+        max_bytes: Optional[int] = None
+    ) -> None:
+        """
+        Initialize the RotatingCsvWriter instance.
+
+        Args:
+            directory (str): The directory to save the parts and the manifest to.
+            prefix (str): The file name prefix, e.g. "output_2024-10-20_12-00".
+            fieldnames (List[str]): The CSV columns.
+            compression (str, optional): None, "gzip" or "zstd". Defaults to None.
+            max_rows (int, optional): The maximum number of rows in a part. Defaults to None.
+            max_bytes (int, optional): The maximum size of a part on disk. An uncompressed part exceeds it
+            by at most one row, a compressed part by at most one row and one compressor block
+            (up to about 64 KiB for gzip and 128 KiB for zstd). Defaults to None.
+        """
+        if compression not in _EXTENSIONS:
+            raise ValueError(f"Unknown compression: {compression}")
+        if compression == "zstd":
+            _import_zstd()
+
+        self.directory = directory
+        self.prefix = prefix
+        self.fieldnames = fieldnames
+        self.compression = compression
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+
+        self.parts: List[Dict[str, Any]] = []
+        self._raw = None
+        self._compressed = None
+        self._text = None
+        self._writer = None
+        self._rows = 0
+
+
+    @property
+    def manifest_path(self) -> str:
+        """The path to the manifest file."""
+        return os.path.join(self.directory, f"{self.prefix}{MANIFEST_SUFFIX}")
+
+
+    def _part_name(self) -> str:
+        extension = ".csv" + _EXTENSIONS[self.compression]
+        if self.max_rows or self.max_bytes:
+            return f"{self.prefix}.part{len(self.parts):04d}{extension}"
+        return f"{self.prefix}{extension}"
+
+
+    def _open_part(self) -> None:
+        name = self._part_name()
+        self._raw = open(os.path.join(self.directory, name), "wb")
+
+        if self.compression == "gzip":
+            self._compressed = gzip.GzipFile(filename="", mode="wb", fileobj=self._raw)
+        elif self.compression == "zstd":
+            self._compressed = _import_zstd().ZstdCompressor().stream_writer(self._raw, closefd=False)
+        else:
+            self._compressed = None
+
+        # Without text buffering the size of the part is known after every row, flushing the compressor would hurt the compression
+        self._text = io.TextIOWrapper(self._compressed or self._raw, newline="", encoding="utf-8", write_through=True)
+        self._writer = csv.DictWriter(self._text, fieldnames=self.fieldnames)
+        self._writer.writeheader()
+
+        self._rows = 0
+        self.parts.append({"file": name, "rows": 0, "bytes": 0})
+
+
+    def _close_part(self) -> None:
+        if self._text is None:
+            return
+
+        # Closing the text wrapper also closes the compressor, which writes the trailer to the raw file
+        self._text.close()
+        if not self._raw.closed:
+            self._raw.close()
+
+        self.parts[-1]["rows"] = self._rows
+        self.parts[-1]["bytes"] = os.path.getsize(os.path.join(self.directory, self.parts[-1]["file"]))
+
+        self._raw = self._compressed = self._text = self._writer = None
+
+
+    def _is_full(self) -> bool:
+        if self.max_rows and self._rows >= self.max_rows:
+            return True
+        # The rows are passed through to the compressor, which still holds its current block,
+        # so the size is checked against what has reached the file
+        if self.max_bytes and self._raw.tell() >= self.max_bytes:
+            return True
+        return False
+
+
+    def writerow(self, row: Dict[str, Any]) -> None:
+        """
+        Write a row, starting a new part if the current one is full.
+
+        Args:
+            row (Dict[str, Any]): The row to write.
+        """
+        if self._writer is None:
+            self._open_part()
+        elif self._is_full():
+            self._close_part()
+            self._open_part()
+
+        self._writer.writerow(row)
+        self._rows += 1
+
+
+    def writerows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """
+        Write several rows.
+
+        Args:
+            rows (Iterable[Dict[str, Any]]): The rows to write.
+        """
+        for row in rows:
+            self.writerow(row)
+
+
+    def close(self, complete: bool = True) -> None:
+        """
+        Close the current part and write the manifest.
+
+        Args:
+            complete (bool, optional): Whether all rows were written. False marks the manifest
+            as incomplete, e.g. when the parsing failed midway. Defaults to True.
+        """
+        if not self.parts:
+            # Keep an empty part with the header, so the readers always find a file
+            self._open_part()
+        self._close_part()
+
+        manifest = {
+            "fieldnames": self.fieldnames,
+            "compression": self.compression,
+            "rows": sum(part["rows"] for part in self.parts),
+            "complete": complete,
+            "parts": self.parts,
+        }
+        with open(self.manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=4)
+
+
+    def __enter__(self) -> "RotatingCsvWriter":
+        return self
+
+
+    def __exit__(self, exc_type, *args) -> None:
+        # On an exception the parts written so far are kept, but the manifest is marked incomplete
+        self.close(complete=exc_type is None)
@@ -0,0 +1,84 @@
+import pytest
+
+from src.analytics import AudienceOverlap
+from src.writers import RotatingCsvWriter
+
+
+RECORDS = [
+    ("a", "p1"), ("b", "p1"), ("c", "p1"), ("a", "p1"),
+    ("b", "p2"), ("c", "p2"), ("d", "p2"),
+    ("e", "p3"),
+]
+
+
+@pytest.fixture
+def overlap() -> AudienceOverlap:
+    return AudienceOverlap.from_records(RECORDS)
+
+
+def write_users(directory: str, prefix: str, users, **kwargs) -> RotatingCsvWriter:
+    with RotatingCsvWriter(directory, prefix, fieldnames=["profile_link", "posts"], **kwargs) as writer:
+        writer.writerows({"profile_link": user, "posts": "[]"} for user in users)
+    return writer
+
+
+def test_repeated_records_are_counted_once(overlap):
+    assert overlap.matrix.max() == 1
+    assert dict(zip(overlap.users, overlap.post_counts())) == {"a": 1, "b": 2, "c": 2, "d": 1, "e": 1}
+    assert list(overlap.voter_counts()) == [3, 3, 1]
+
+
+def test_top_users(overlap):
+    assert sorted(overlap.top_users(k=2)) == [("b", 2), ("c", 2)]
+    assert len(overlap.top_users(k=10)) == 5
+    assert overlap.top_users(k=10, min_posts=2)[0][1] == 2
+    assert overlap.top_users(k=0) == []
+
+    with pytest.raises(ValueError):
+        overlap.top_users(k=-1)
+
+
+def test_overlap_and_jaccard(overlap):
+    assert overlap.overlap_matrix().tolist() == [[3, 2, 0], [2, 3, 0], [0, 0, 1]]
+    assert overlap.jaccard_matrix()[0, 1] == pytest.approx(0.5)
+    assert sorted(overlap.common_users(["p1", "p2"])) == ["b", "c"]
+
+
+def test_top_similar_posts(overlap):
+    assert overlap.top_similar_posts("p1", k=5) == [("p2", 0.5), ("p3", 0.0)]
+    assert overlap.top_similar_posts("p1", k=1) == [("p2", 0.5)]
+    assert overlap.top_similar_posts("p1", k=0) == []
+    assert AudienceOverlap.from_records([("a", "p1")]).top_similar_posts("p1") == []
+
+    with pytest.raises(ValueError):
+        overlap.top_similar_posts("p1", k=-1)
+    with pytest.raises(KeyError):
+        overlap.top_similar_posts("p4")
+
+
+def test_post_clusters(overlap):
+    assert overlap.post_clusters(threshold=0.3) == [["p1", "p2"], ["p3"]]
+    assert len(overlap.post_clusters(threshold=0.6)) == 3
+
+
+def test_from_files_reads_manifests(tmp_path):
+    first = write_users(str(tmp_path), "first", ["a", "b", "c"], compression="gzip", max_rows=2)
+    write_users(str(tmp_path), "second", ["b", "d"])
+
+    overlap = AudienceOverlap.from_files({
+        "first": first.manifest_path,
+        "second": str(tmp_path / "second.csv"),
+    })
+
+    assert len(first.parts) == 2
+    assert overlap.posts == ["first", "second"]
+    assert overlap.common_users() == ["b"]
+
+
+def test_from_files_rejects_duplicate_names(tmp_path):
+    for directory in ("a", "b"):
+        (tmp_path / directory).mkdir()
+        write_users(str(tmp_path / directory), "output", ["a"])
+
+    with pytest.raises(ValueError):
+        AudienceOverlap.from_files([str(tmp_path / "a" / "output.csv"), str(tmp_path / "b" / "output.csv")])
@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+from src.dedup import BloomDeduplicator, ExactDeduplicator, create_deduplicator
+from src.parser import MediumParser
+from src.transport import ReplaySession
+
+
+CASSETTE = os.path.join(os.path.dirname(__file__), "fixtures", "post_voters.jsonl")
+LINK = "https://medium.com/@author/test-post-0123456789ab"
+
+
+def make_keys(count: int):
+    return [f"https://medium.com/@user_{i}" for i in range(count)]
+
+
+def test_exact_grows_past_capacity():
+    dedup = ExactDeduplicator(capacity=4)
+    initial_memory = dedup.memory_usage
+    keys = make_keys(1000)
+
+    assert all(dedup.add(key) for key in keys)
+    assert dedup.memory_usage > initial_memory
+    assert len(dedup) == 1000
+    # Every key is still found after the rehashes
+    assert all(key in dedup for key in keys)
+    assert not any(dedup.add(key) for key in keys)
+    assert "https://medium.com/@someone_else" not in dedup
+
+
+def test_bloom_add_contains_and_len():
+    dedup = BloomDeduplicator(capacity=1000, error_rate=0.01)
+    keys = make_keys(1000)
+
+    unique = sum(dedup.add(key) for key in keys)
+    assert all(key in dedup for key in keys)
+    assert not any(dedup.add(key) for key in keys)
+    assert len(dedup) == unique
+    # False positives only drop new keys, at roughly the configured rate
+    assert unique >= 980
+
+
+def test_create_deduplicator():
+    assert isinstance(create_deduplicator("exact"), ExactDeduplicator)
+    assert isinstance(create_deduplicator("bloom", capacity=10), BloomDeduplicator)
+
+    with pytest.raises(ValueError):
+        create_deduplicator("cuckoo")
+    with pytest.raises(ValueError):
+        BloomDeduplicator(capacity=0)
+    with pytest.raises(ValueError):
+        BloomDeduplicator(capacity=10, error_rate=1)
+
+
+def test_fetch_skips_seen_users():
+    parser = MediumParser(
+        app=None,
+        log_func=lambda *args: None,
+        session_factory=lambda: ReplaySession(CASSETTE)
+    )
+    dedup = ExactDeduplicator()
+    dedup.add("https://bob.example.com")
+
+    users = list(parser.iter_users_who_liked_post(LINK, dedup=dedup))
+    assert [user["user_id"] for user in users] == ["u1", "u4"]
+
+    # A second post with the same voters adds nobody
+    assert parser.fetch_users_who_liked_post(LINK, dedup=dedup) == []
+    assert len(dedup) == 3
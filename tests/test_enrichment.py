@@ -0,0 +1,148 @@
+import os
+import threading
+
+from src.enrichment import ProfileCache, ProfileEnricher
+from src.parser import MediumParser
+from src.transport import ReplaySession
+
+
+CASSETTE = os.path.join(os.path.dirname(__file__), "fixtures", "user_profiles.jsonl")
+
+
+class StubSession:
+
+    def __init__(self) -> None:
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class StubParser(MediumParser):
+    """
+    Parser, that returns profiles for the known users, null for the others, and counts the lookups.
+    """
+
+    def __init__(self, known_ids) -> None:
+        super().__init__(app=None, log_func=lambda *args: None)
+        self.known_ids = set(known_ids)
+        self.requested = []
+        self.sessions = []
+        self.release = threading.Event()
+        self.release.set()
+        self.fail = False
+
+    def create_session(self) -> StubSession:
+        session = StubSession()
+        self.sessions.append(session)
+        return session
+
+    def fetch_user_profiles(self, user_ids, session=None):
+        self.release.wait()
+        self.requested.extend(user_ids)
+        if self.fail:
+            return None
+        return {
+            user_id: {"name": user_id.upper(), "bio": "", "followers": 1} if user_id in self.known_ids else None
+            for user_id in user_ids
+        }
+
+
+def make_users(count: int, distinct: int):
+    return [{"profile_link": f"link{i}", "user_id": f"u{i % distinct}", "posts": "[]"} for i in range(count)]
+
+
+def test_missing_profiles_are_cached():
+    parser = StubParser(known_ids=["u0", "u1"])
+    cache = ProfileCache(":memory:")
+
+    with ProfileEnricher(parser, cache=cache, batch_size=3) as enricher:
+        users = list(enricher.enrich(make_users(12, 6)))
+        assert sorted(parser.requested) == ["u0", "u1", "u2", "u3", "u4", "u5"]
+        assert [user["name"] for user in users[:3]] == ["U0", "U1", ""]
+
+        parser.requested.clear()
+        list(enricher.enrich(make_users(12, 6)))
+        assert parser.requested == []
+
+    assert all(session.closed for session in parser.sessions)
+
+
+def test_pending_batches_are_bounded():
+    parser = StubParser(known_ids=[])
+    parser.release.clear()
+    enricher = ProfileEnricher(parser, cache=ProfileCache(":memory:"), batch_size=1, max_workers=1)
+    consumed = []
+
+    def users():
+        for user in make_users(10, 10):
+            consumed.append(user)
+            yield user
+
+    stream = enricher.enrich(users())
+    thread = threading.Thread(target=lambda: next(stream))
+    thread.start()
+    thread.join(timeout=0.5)
+
+    # The stage waits for the oldest lookup instead of reading all users ahead
+    assert len(consumed) == 2
+
+    parser.release.set()
+    thread.join()
+    assert len(list(stream)) == 9
+
+
+def test_failed_lookups_are_not_cached():
+    parser = StubParser(known_ids=["u0", "u1"])
+    parser.fail = True
+    enricher = ProfileEnricher(parser, cache=ProfileCache(":memory:"), batch_size=2)
+
+    assert [user["name"] for user in enricher.enrich(make_users(2, 2))] == ["", ""]
+
+    parser.fail = False
+    parser.requested.clear()
+    assert [user["name"] for user in enricher.enrich(make_users(2, 2))] == ["U0", "U1"]
+    assert parser.requested == ["u0", "u1"]
+
+
+def make_replay_parser() -> MediumParser:
+    return MediumParser(
+        app=None,
+        log_func=lambda *args: None,
+        session_factory=lambda: ReplaySession(CASSETTE)
+    )
+
+
+def test_fetch_user_profiles_parses_response():
+    profiles = make_replay_parser().fetch_user_profiles(["u1", "u2", "u3"])
+
+    assert profiles == {
+        "u1": {"name": "Alice", "bio": "Writes about Python", "followers": 120},
+        "u2": None,
+        "u3": {"name": "Carol", "bio": "", "followers": None},
+    }
+
+
+def test_fetch_user_profiles_signals_failures():
+    parser = make_replay_parser()
+
+    assert parser.fetch_user_profiles(["u4"]) is None
+    # A null user next to errors may be a failure, so it is left out instead of reported as missing
+    assert parser.fetch_user_profiles(["u5", "u6"]) == {"u6": {"name": "Frank", "bio": None, "followers": 3}}
+
+
+def test_enrich_over_replayed_profiles():
+    cache = ProfileCache(":memory:")
+    enricher = ProfileEnricher(make_replay_parser(), cache=cache, batch_size=3, max_workers=1)
+    users = [{"profile_link": f"link{i}", "user_id": f"u{i}", "posts": "[]"} for i in range(1, 5)]
+
+    enriched = list(enricher.enrich(users))
+
+    assert [user["name"] for user in enriched] == ["Alice", "", "Carol", ""]
+    assert enriched[0]["followers"] == 120
+    # The rate limited user is not cached, the missing one is
+    assert cache.get_many(["u1", "u2", "u3", "u4"]) == {
+        "u1": {"name": "Alice", "bio": "Writes about Python", "followers": 120},
+        "u2": None,
+        "u3": {"name": "Carol", "bio": "", "followers": None},
+    }
@@ -0,0 +1,58 @@
+import os
+import json
+
+import pytest
+
+from src.parser import MediumParser
+from src.transport import ReplaySession
+from src.writers import RotatingCsvWriter, iter_rows
+
+
+CASSETTE = os.path.join(os.path.dirname(__file__), "fixtures", "post_voters.jsonl")
+LINK = "https://medium.com/@author/test-post-0123456789ab"
+
+
+def make_parser(cassette: str = CASSETTE, speed: float = 0) -> MediumParser:
+    return MediumParser(
+        app=None,
+        log_func=lambda *args: None,
+        session_factory=lambda: ReplaySession(cassette, speed=speed)
+    )
+
+
+def test_fetch_users_who_liked_post_replays_all_pages():
+    users = make_parser().fetch_users_who_liked_post(LINK)
+
+    assert [user["profile_link"] for user in users] == [
+        "https://medium.com/@alice",
+        "https://bob.example.com",
+        "https://medium.com/@dave",
+    ]
+    assert [user["user_id"] for user in users] == ["u1", "u2", "u4"]
+    assert json.loads(users[0]["posts"]) == [
+        {"id": "a1", "url": "https://medium.com/@alice/post-a1"},
+        {"id": "a2", "url": "https://medium.com/@alice/post-a2"},
+    ]
+
+
+def test_export_through_rotating_writer(tmp_path):
+    users = make_parser().iter_users_who_liked_post(LINK)
+
+    with RotatingCsvWriter(str(tmp_path), "output", fieldnames=MediumParser.USER_FIELDS, compression="gzip", max_rows=2) as writer:
+        writer.writerows(users)
+
+    assert [part["rows"] for part in writer.parts] == [2, 1]
+    rows = list(iter_rows(writer.manifest_path))
+    assert [row["user_id"] for row in rows] == ["u1", "u2", "u4"]
+    assert rows[1]["profile_link"] == "https://bob.example.com"
+
+
+def test_replay_with_changed_query_fails():
+    session = ReplaySession(CASSETTE)
+    variables = {"postId": "0123456789ab", "pagingOptions": {"limit": 25}}
+
+    with pytest.raises(LookupError, match="record it again"):
+        session.post(
+            "https://medium.com/_/graphql",
+            json={"operationName": "PostVotersDialogQuery", "query": "query { post { title } }", "variables": variables}
+        )
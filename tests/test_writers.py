@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from src.writers import RotatingCsvWriter, iter_rows
+
+
+def write_users(directory: str, users, **kwargs) -> RotatingCsvWriter:
+    with RotatingCsvWriter(directory, "output", fieldnames=["profile_link", "posts"], **kwargs) as writer:
+        writer.writerows(users)
+    return writer
+
+
+def make_users(count: int):
+    return ({"profile_link": f"https://medium.com/@user_{i}", "posts": "[]"} for i in range(count))
+
+
+def test_complete_manifest(tmp_path):
+    writer = write_users(str(tmp_path), make_users(5), compression="gzip", max_rows=2)
+
+    with open(writer.manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    assert manifest["complete"] is True
+    assert manifest["rows"] == 5
+    assert [part["rows"] for part in manifest["parts"]] == [2, 2, 1]
+    assert len(list(iter_rows(writer.manifest_path))) == 5
+
+
+def test_failed_run_marks_manifest_incomplete(tmp_path):
+    def users():
+        yield from make_users(3)
+        raise RuntimeError("parsing failed")
+
+    writer = RotatingCsvWriter(str(tmp_path), "output", fieldnames=["profile_link", "posts"], max_rows=2)
+    with pytest.raises(RuntimeError):
+        with writer:
+            writer.writerows(users())
+
+    with open(writer.manifest_path, encoding="utf-8") as f:
+        assert json.load(f)["complete"] is False
+    with pytest.raises(ValueError, match="incomplete"):
+        list(iter_rows(writer.manifest_path))
+    assert len(list(iter_rows(writer.manifest_path, allow_incomplete=True))) == 3